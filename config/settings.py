@@ -76,6 +76,22 @@ SCHEDULE_CONFIG = {
     "retry_delay": 300,  # 5 minutes
 }
 
+# Retention settings
+RETENTION_CONFIG = {
+    "logs_archive_after_days": 7,  # Logs older than this get compacted into monthly archives
+    # PATHS keys whose files get compacted. Ledgers feed trend analysis and
+    # leases/pmas/work_orders are the document library, so they stay out by default.
+    # Loose downloads in the DATA_DIR root are always compacted.
+    "artifact_folders": ["analyzed"],
+    "artifacts_archive_after_days": 90,
+    "prune_empty_folders": ["ledgers"],  # PATHS keys whose empty dated subfolders get removed
+    "compact_on_start": True,  # Compact before each automation run
+    "logs_archive_dir": LOGS_DIR / "archive",
+    "artifacts_archive_dir": DATA_DIR / "archive",
+    "history_db": LOGS_DIR / "run_history.sqlite3",
+    "redaction_text": "***REDACTED***",
+}
+
 # Create directories if they don't exist
 for path in PATHS.values():
     path.mkdir(parents=True, exist_ok=True)
\ No newline at end of file
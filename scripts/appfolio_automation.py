@@ -15,28 +15,50 @@ sys.path.append(str(Path(__file__).parent.parent))
 
 from browser_use import Agent, Browser
 from config.settings import (
-    APPFOLIO_CONFIG, BROWSER_CONFIG, PATHS, AI_CONFIG
+    APPFOLIO_CONFIG, BROWSER_CONFIG, PATHS, AI_CONFIG, RETENTION_CONFIG
 )
+from scripts.retention import RunHistory, compact, redact_record
 
 class AppFolioAutomator:
+    log_handler_id = None
+
     def __init__(self):
         """Initialize the AppFolio automation system"""
         self.setup_logging()
         self.browser = None
         self.agent = None
+        self.history = RunHistory()
         
     def setup_logging(self):
         """Configure logging for the automation system"""
+        # Redact credentials before any sink (console or file) sees the message
+        logger.configure(patcher=redact_record)
+
+        # Replace rather than stack the file sink when several automators are created
+        if AppFolioAutomator.log_handler_id is not None:
+            logger.remove(AppFolioAutomator.log_handler_id)
+
+        # Old logs are compacted into monthly archives by scripts/retention.py
         log_file = PATHS["logs"] / f"appfolio_automation_{datetime.now().strftime('%Y%m%d')}.log"
-        logger.add(
+        AppFolioAutomator.log_handler_id = logger.add(
             log_file,
-            rotation="1 day",
-            retention="30 days",
             level="INFO",
-            format="{time:YYYY-MM-DD HH:mm:ss} | {level} | {message}"
+            format="{time:YYYY-MM-DD HH:mm:ss} | {level} | {message}",
+            diagnose=False  # Keep local variable values (credentials) out of tracebacks
         )
         logger.info("AppFolio Automation System initialized")
 
+    def compact_old_files(self):
+        """Archive old logs and artifacts before starting a run"""
+        if not RETENTION_CONFIG["compact_on_start"]:
+            return
+        try:
+            archived = compact(self.history)
+            if archived:
+                logger.info(f"🗜️ Archived {len(archived)} old log/artifact file(s)")
+        except Exception as e:
+            logger.warning(f"Log and artifact compaction failed: {e}")
+
     async def initialize_browser(self):
         """Initialize browser-use with configuration to use existing Chrome"""
         try:
@@ -300,75 +322,97 @@ class AppFolioAutomator:
     async def run_daily_automation(self):
         """Run the complete daily automation workflow"""
         logger.info("Starting daily AppFolio automation")
-        
-        # Initialize browser
-        if not await self.initialize_browser():
-            return False
+        self.compact_old_files()
+        run_id = self.history.start_run("daily")
+        logger.info(f"Run id: {run_id}")
+        status = "failed"
         
         try:
+            # Initialize browser
+            if not await self.history.track_step(run_id, "initialize_browser", self.initialize_browser()):
+                return False
+            
             # Step 1: Login to AppFolio
             logger.info("Step 1: Logging into AppFolio")
-            if not await self.login_to_appfolio():
+            if not await self.history.track_step(run_id, "login", self.login_to_appfolio()):
                 logger.error("Login failed, stopping automation")
                 return False
             
             # Step 1.5: Handle password save popup
             logger.info("Step 1.5: Handling password save popup")
-            await self.handle_password_save_popup()
+            await self.history.track_step(run_id, "password_save_popup", self.handle_password_save_popup())
             
             # Step 2: Handle 2FA manually
             logger.info("Step 2: Handling 2FA authentication")
-            if not await self.handle_2fa_manually():
+            if not await self.history.track_step(run_id, "2fa", self.handle_2fa_manually()):
                 logger.error("2FA handling failed, stopping automation")
                 return False
             
             # Step 3: Download ledger report
             logger.info("Step 3: Downloading ledger report")
-            await self.download_ledger_report()
+            await self.history.track_step(run_id, "ledger_report", self.download_ledger_report())
 
             # Step 4: Navigate to statements
             logger.info("Step 4: Navigating to statements page")
-            await self.navigate_to_statements()
+            await self.history.track_step(run_id, "statements", self.navigate_to_statements())
             
             # Step 5: Download new documents
             logger.info("Step 5: Downloading new documents")
-            await self.download_documents()
+            await self.history.track_step(run_id, "documents", self.download_documents())
             
             logger.info("Daily automation completed successfully")
+            status = "ok"
             return True
             
         except Exception as e:
             logger.error(f"Automation failed: {e}")
+            status = "error"
             return False
+        except BaseException:
+            # KeyboardInterrupt/CancelledError, matching the interrupted step row
+            status = "interrupted"
+            raise
         finally:
+            self.history.finish_run(run_id, status)
             # Browser cleanup is handled automatically by browser-use
             logger.info("🔄 Browser session completed")
 
     async def test_login_only(self):
         """Test login functionality with 2FA handling"""
         logger.info("Testing AppFolio login with 2FA")
-        
-        if not await self.initialize_browser():
-            return False
+        run_id = self.history.start_run("test-login")
+        status = "failed"
         
         try:
+            if not await self.history.track_step(run_id, "initialize_browser", self.initialize_browser()):
+                return False
+            
             # Step 1: Login to AppFolio
-            success = await self.login_to_appfolio()
+            success = await self.history.track_step(run_id, "login", self.login_to_appfolio())
             if not success:
                 logger.error("Login test failed")
                 return False
             
             # Step 1.5: Handle password save popup
-            await self.handle_password_save_popup()
+            await self.history.track_step(run_id, "password_save_popup", self.handle_password_save_popup())
             
             # Step 2: Handle 2FA manually
-            success = await self.handle_2fa_manually()
+            success = await self.history.track_step(run_id, "2fa", self.handle_2fa_manually())
             if success:
                 logger.info("Login and 2FA test successful")
+                status = "ok"
             else:
                 logger.error("2FA handling failed")
             return success
+        except Exception:
+            status = "error"
+            raise
+        except BaseException:
+            # KeyboardInterrupt/CancelledError, matching the interrupted step row
+            status = "interrupted"
+            raise
         finally:
+            self.history.finish_run(run_id, status)
             # Browser cleanup is handled automatically by browser-use
             logger.info("🔄 Browser session completed")
 
@@ -377,11 +421,14 @@ async def main():
     """Main function to run the automation"""
     automator = AppFolioAutomator()
     
-    # Check if this is a test run
-    if len(sys.argv) > 1 and sys.argv[1] == "--test-login":
-        await automator.test_login_only()
-    else:
-        await automator.run_daily_automation()
+    try:
+        # Check if this is a test run
+        if len(sys.argv) > 1 and sys.argv[1] == "--test-login":
+            await automator.test_login_only()
+        else:
+            await automator.run_daily_automation()
+    finally:
+        automator.history.close()
 
 
 if __name__ == "__main__":
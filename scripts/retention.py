@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+"""
+Log and artifact retention for the AppFolio automation system.
+Redacts secrets before they reach the logs, compacts old logs and downloads
+into per-month zip archives, and keeps a SQLite index of automation runs.
+"""
+
+import argparse
+import re
+import sqlite3
+import sys
+import time
+import uuid
+import zipfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config.settings import (
+    APPFOLIO_CONFIG, AI_CONFIG, SMS_CONFIG, DATA_DIR, PATHS, RETENTION_CONFIG
+)
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+LOG_DATE_PATTERN = re.compile(r"(\d{8})")
+
+# Credential values from the environment that must never be written to disk
+SECRET_VALUES = sorted(
+    {
+        value for value in (
+            APPFOLIO_CONFIG["username"],
+            APPFOLIO_CONFIG["password"],
+            SMS_CONFIG["twilio_token"],
+            AI_CONFIG["gemini_api_key"],
+            AI_CONFIG["openai_api_key"],
+        )
+        if value and len(value) >= 4
+    },
+    key=len,
+    reverse=True,
+)
+
+# Labelled secrets such as "Password: hunter2" or "api_key=sk-..."
+SECRET_PATTERN = re.compile(
+    r"(?i)\b(password|passwd|api[_ -]?key|auth[_ -]?token|token|secret)([ \t]*[:=][ \t]*)(\S+)"
+)
+
+
+def redact(text):
+    """Replace known credential values and labelled secrets in text"""
+    replacement = RETENTION_CONFIG["redaction_text"]
+    for value in SECRET_VALUES:
+        text = text.replace(value, replacement)
+    return SECRET_PATTERN.sub(lambda m: f"{m.group(1)}{m.group(2)}{replacement}", text)
+
+
+def redact_record(record):
+    """Loguru patcher that redacts the message before any sink writes it.
+
+    Only the message is redacted: tracebacks attached via logger.exception are
+    rendered by the sink, so the file sink runs with diagnose=False to keep
+    local variable values (such as credentials) out of the log.
+    """
+    record["message"] = redact(record["message"])
+
+
+def _is_within(path, directory):
+    """Check whether path lives under directory"""
+    try:
+        path.resolve().relative_to(Path(directory).resolve())
+        return True
+    except ValueError:
+        return False
+
+
+def _archive_file(path, archive_path, arcname, redacted=False):
+    """Append a file to a zip archive, keeping earlier entries with the same name.
+
+    With redacted=True the file is treated as text and run through redact() first,
+    so logs written before redaction existed don't carry credentials into archives.
+    """
+    archive_path.parent.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(archive_path, "a", compression=zipfile.ZIP_DEFLATED) as archive:
+        existing = set(archive.namelist())
+        candidate = arcname
+        counter = 1
+        while candidate in existing:
+            stem, dot, suffix = arcname.rpartition(".")
+            candidate = f"{stem}.{counter}.{suffix}" if dot else f"{arcname}.{counter}"
+            counter += 1
+        if redacted:
+            info = zipfile.ZipInfo.from_file(path, candidate)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            text = path.read_text(encoding="utf-8", errors="replace")
+            archive.writestr(info, redact(text))
+        else:
+            archive.write(path, candidate)
+    return candidate
+
+
+def _prune_empty_dirs(root):
+    """Remove empty subdirectories left behind after archiving"""
+    keep = {path.resolve() for path in PATHS.values()}
+    for directory in sorted((p for p in root.rglob("*") if p.is_dir()), reverse=True):
+        if directory.resolve() not in keep and not any(directory.iterdir()):
+            directory.rmdir()
+
+
+def _log_date(path):
+    """Date a log file from the YYYYMMDD stamp in its name, falling back to mtime"""
+    match = LOG_DATE_PATTERN.search(path.name)
+    if match:
+        try:
+            return datetime.strptime(match.group(1), "%Y%m%d")
+        except ValueError:
+            pass
+    return datetime.fromtimestamp(path.stat().st_mtime)
+
+
+def iter_artifacts():
+    """Yield downloaded artifact files, skipping the archive folder"""
+    archive_dir = RETENTION_CONFIG["artifacts_archive_dir"]
+    if not DATA_DIR.exists():
+        return
+    for path in DATA_DIR.rglob("*"):
+        if path.is_file() and not _is_within(path, archive_dir):
+            yield path
+
+
+def snapshot_artifacts():
+    """Map each artifact path to its modification time"""
+    return {path: path.stat().st_mtime for path in iter_artifacts()}
+
+
+def compact(history=None, now=None, logs_after_days=None, artifacts_after_days=None):
+    """Move old logs, loose downloads, and allow-listed artifacts into monthly zip archives"""
+    now = now or datetime.now()
+    if logs_after_days is None:
+        logs_after_days = RETENTION_CONFIG["logs_archive_after_days"]
+    if artifacts_after_days is None:
+        artifacts_after_days = RETENTION_CONFIG["artifacts_archive_after_days"]
+    logs_cutoff = now - timedelta(days=logs_after_days)
+    artifacts_cutoff = now - timedelta(days=artifacts_after_days)
+    logs_dir = PATHS["logs"]
+    logs_archive_dir = RETENTION_CONFIG["logs_archive_dir"]
+    artifacts_archive_dir = RETENTION_CONFIG["artifacts_archive_dir"]
+    history_db = Path(RETENTION_CONFIG["history_db"])
+
+    # (file, date used for cutoff and month bucket, cutoff, archive folder, name in archive, redact)
+    candidates = []
+    if logs_dir.exists():
+        for path in logs_dir.iterdir():
+            # Never archive the run history database or its journal files
+            if path.is_file() and not path.name.startswith(history_db.name):
+                candidates.append(
+                    (path, _log_date(path), logs_cutoff, logs_archive_dir, path.name, True)
+                )
+
+    # The browser saves downloads straight into DATA_DIR
+    if DATA_DIR.exists():
+        for path in DATA_DIR.iterdir():
+            if path.is_file():
+                candidates.append((
+                    path,
+                    datetime.fromtimestamp(path.stat().st_mtime),
+                    artifacts_cutoff,
+                    artifacts_archive_dir,
+                    path.name,
+                    False,
+                ))
+
+    folders = {key: PATHS[key] for key in RETENTION_CONFIG["artifact_folders"]}
+    for key, folder in folders.items():
+        if not folder.exists():
+            continue
+        for path in folder.rglob("*"):
+            if path.is_file() and not _is_within(path, artifacts_archive_dir):
+                candidates.append((
+                    path,
+                    datetime.fromtimestamp(path.stat().st_mtime),
+                    artifacts_cutoff,
+                    artifacts_archive_dir,
+                    f"{key}/{path.relative_to(folder).as_posix()}",
+                    False,
+                ))
+
+    archived = []
+    for path, dated, cutoff, archive_dir, arcname, redacted in candidates:
+        if dated >= cutoff:
+            continue
+        archive_path = archive_dir / f"{dated.strftime('%Y-%m')}.zip"
+        stored_name = _archive_file(path, archive_path, arcname, redacted)
+        if history:
+            history.mark_archived(path, archive_path, stored_name)
+        path.unlink()
+        archived.append((path, archive_path))
+
+    prune_keys = set(RETENTION_CONFIG["artifact_folders"]) | set(RETENTION_CONFIG["prune_empty_folders"])
+    for key in prune_keys:
+        if PATHS[key].exists():
+            _prune_empty_dirs(PATHS[key])
+    return archived
+
+
+class RunHistory:
+    """SQLite index of automation runs, their steps, and produced artifacts"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS runs (
+            run_id TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            started_at TEXT NOT NULL,
+            finished_at TEXT,
+            duration REAL,
+            status TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS steps (
+            run_id TEXT NOT NULL REFERENCES runs(run_id),
+            seq INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            started_at TEXT NOT NULL,
+            duration REAL NOT NULL,
+            status TEXT NOT NULL,
+            error TEXT,
+            PRIMARY KEY (run_id, seq)
+        );
+        CREATE TABLE IF NOT EXISTS artifacts (
+            run_id TEXT NOT NULL REFERENCES runs(run_id),
+            step_seq INTEGER,
+            path TEXT NOT NULL,
+            size INTEGER,
+            recorded_at TEXT NOT NULL,
+            archive_path TEXT,
+            archive_name TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_runs_started_at ON runs(started_at);
+        CREATE INDEX IF NOT EXISTS idx_artifacts_run_id ON artifacts(run_id);
+        CREATE INDEX IF NOT EXISTS idx_artifacts_path ON artifacts(path);
+    """
+
+    def __init__(self, db_path=None):
+        """Open (and create if needed) the run history database"""
+        self.db_path = Path(db_path or RETENTION_CONFIG["history_db"])
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(self.SCHEMA)
+        self._run_started = {}
+        self._step_counts = {}
+
+    def close(self):
+        """Close the database connection"""
+        self.conn.close()
+
+    def start_run(self, kind):
+        """Record the start of a run and return its id"""
+        started = datetime.now()
+        run_id = f"{started.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO runs (run_id, kind, started_at, status) VALUES (?, ?, ?, ?)",
+                (run_id, kind, started.strftime(TIMESTAMP_FORMAT), "running"),
+            )
+        self._run_started[run_id] = time.monotonic()
+        self._step_counts[run_id] = 0
+        return run_id
+
+    def finish_run(self, run_id, status):
+        """Record the outcome and total duration of a run"""
+        duration = time.monotonic() - self._run_started.pop(run_id, time.monotonic())
+        self._step_counts.pop(run_id, None)
+        with self.conn:
+            self.conn.execute(
+                "UPDATE runs SET finished_at = ?, duration = ?, status = ? WHERE run_id = ?",
+                (datetime.now().strftime(TIMESTAMP_FORMAT), duration, status, run_id),
+            )
+
+    async def track_step(self, run_id, name, step):
+        """Await a step coroutine, recording its duration, outcome, and new artifacts"""
+        self._step_counts[run_id] = seq = self._step_counts.get(run_id, 0) + 1
+        started = datetime.now()
+        before = snapshot_artifacts()
+        start = time.monotonic()
+        # Stays "interrupted" for BaseExceptions such as KeyboardInterrupt or CancelledError
+        status = "interrupted"
+        error = None
+        try:
+            result = await step
+            status = "ok" if result else "failed"
+            return result
+        except Exception as e:
+            status = "error"
+            error = redact(str(e))
+            raise
+        finally:
+            duration = time.monotonic() - start
+            after = snapshot_artifacts()
+            produced = [path for path, mtime in after.items() if before.get(path) != mtime]
+            with self.conn:
+                self.conn.execute(
+                    "INSERT INTO steps (run_id, seq, name, started_at, duration, status, error) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (run_id, seq, name, started.strftime(TIMESTAMP_FORMAT), duration, status, error),
+                )
+                self.conn.executemany(
+                    "INSERT INTO artifacts (run_id, step_seq, path, size, recorded_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (run_id, seq, str(path), path.stat().st_size,
+                         datetime.now().strftime(TIMESTAMP_FORMAT))
+                        for path in produced if path.exists()
+                    ],
+                )
+
+    def mark_archived(self, path, archive_path, archive_name):
+        """Point recorded artifacts at the archive they were compacted into"""
+        with self.conn:
+            self.conn.execute(
+                "UPDATE artifacts SET archive_path = ?, archive_name = ? "
+                "WHERE path = ? AND archive_path IS NULL",
+                (str(archive_path), archive_name, str(path)),
+            )
+
+    def runs_between(self, start, end):
+        """Return runs started in [start, end)"""
+        return self.conn.execute(
+            "SELECT * FROM runs WHERE started_at >= ? AND started_at < ? ORDER BY started_at",
+            (start.strftime(TIMESTAMP_FORMAT), end.strftime(TIMESTAMP_FORMAT)),
+        ).fetchall()
+
+    def runs_on(self, day):
+        """Return runs started on the given date"""
+        start = datetime(day.year, day.month, day.day)
+        return self.runs_between(start, start + timedelta(days=1))
+
+    def steps(self, run_id):
+        """Return the steps of a run in execution order"""
+        return self.conn.execute(
+            "SELECT * FROM steps WHERE run_id = ? ORDER BY seq", (run_id,)
+        ).fetchall()
+
+    def artifacts(self, run_id):
+        """Return the artifacts produced by a run"""
+        return self.conn.execute(
+            "SELECT * FROM artifacts WHERE run_id = ? ORDER BY step_seq, path", (run_id,)
+        ).fetchall()
+
+
+def print_run(history, run):
+    """Print a run with its steps and artifacts"""
+    duration = f"{run['duration']:.1f}s" if run["duration"] is not None else "-"
+    print(f"📋 {run['run_id']} [{run['kind']}] {run['started_at']} {run['status']} ({duration})")
+    for step in history.steps(run["run_id"]):
+        error = f" - {step['error']}" if step["error"] else ""
+        print(f"   {step['seq']}. {step['name']}: {step['status']} ({step['duration']:.1f}s){error}")
+    for artifact in history.artifacts(run["run_id"]):
+        location = artifact["path"]
+        if artifact["archive_path"]:
+            location = f"{artifact['archive_path']}:{artifact['archive_name']}"
+        print(f"   📄 {location}")
+
+
+def main():
+    """Command line entry point for compaction and run history queries"""
+    parser = argparse.ArgumentParser(description="AppFolio automation log and artifact retention")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    compact_parser = subparsers.add_parser("compact", help="Archive old logs and artifacts")
+    compact_parser.add_argument(
+        "--log-days", type=int, default=RETENTION_CONFIG["logs_archive_after_days"],
+        help="Archive logs older than this many days",
+    )
+    compact_parser.add_argument(
+        "--artifact-days", type=int, default=RETENTION_CONFIG["artifacts_archive_after_days"],
+        help="Archive allow-listed artifacts older than this many days",
+    )
+
+    history_parser = subparsers.add_parser("history", help="Show recorded runs")
+    history_parser.add_argument("--date", help="Show runs started on this day (YYYY-MM-DD)")
+    history_parser.add_argument("--run", help="Show a single run by id")
+
+    args = parser.parse_args()
+    history = RunHistory()
+    try:
+        if args.command == "compact":
+            archived = compact(
+                history, logs_after_days=args.log_days, artifacts_after_days=args.artifact_days
+            )
+            for path, archive_path in archived:
+                print(f"🗜️  {path} -> {archive_path}")
+            print(f"✅ Archived {len(archived)} file(s)")
+        elif args.run:
+            run = history.conn.execute(
+                "SELECT * FROM runs WHERE run_id = ?", (args.run,)
+            ).fetchone()
+            if run is None:
+                print(f"❌ No run found with id {args.run}")
+                return 1
+            print_run(history, run)
+        else:
+            day = datetime.strptime(args.date, "%Y-%m-%d") if args.date else datetime.now()
+            runs = history.runs_on(day)
+            if not runs:
+                print(f"No runs recorded on {day.strftime('%Y-%m-%d')}")
+            for run in runs:
+                print_run(history, run)
+    finally:
+        history.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,291 @@
+"""
+Tests for log/artifact retention, secret redaction, and the run history index
+"""
+
+import asyncio
+import os
+import sys
+import zipfile
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from scripts import retention
+from scripts.retention import RunHistory, compact, redact
+
+NOW = datetime(2025, 10, 20, 12, 0, 0)
+
+
+def write_file(path, content="data", modified=None):
+    """Create a file, optionally backdating its modification time"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+    if modified:
+        ts = modified.timestamp()
+        os.utime(path, (ts, ts))
+    return path
+
+
+@pytest.fixture
+def layout(tmp_path, monkeypatch):
+    """Point the retention module at a throwaway data/logs tree"""
+    data_dir = tmp_path / "data"
+    logs_dir = tmp_path / "logs"
+    paths = {
+        "ledgers": data_dir / "ledgers",
+        "analyzed": data_dir / "analyzed",
+        "leases": data_dir / "leases",
+        "logs": logs_dir,
+    }
+    for path in paths.values():
+        path.mkdir(parents=True)
+
+    monkeypatch.setattr(retention, "DATA_DIR", data_dir)
+    monkeypatch.setattr(retention, "PATHS", paths)
+    monkeypatch.setattr(retention, "SECRET_VALUES", ["s3cretPW", "bob@example.com"])
+    monkeypatch.setitem(retention.RETENTION_CONFIG, "logs_archive_dir", logs_dir / "archive")
+    monkeypatch.setitem(retention.RETENTION_CONFIG, "artifacts_archive_dir", data_dir / "archive")
+    monkeypatch.setitem(retention.RETENTION_CONFIG, "history_db", logs_dir / "run_history.sqlite3")
+    monkeypatch.setitem(retention.RETENTION_CONFIG, "artifact_folders", ["analyzed"])
+    monkeypatch.setitem(retention.RETENTION_CONFIG, "logs_archive_after_days", 7)
+    monkeypatch.setitem(retention.RETENTION_CONFIG, "artifacts_archive_after_days", 90)
+    monkeypatch.setitem(retention.RETENTION_CONFIG, "prune_empty_folders", ["ledgers"])
+    return paths
+
+
+@pytest.fixture
+def history(layout):
+    """Run history database inside the throwaway tree"""
+    history = RunHistory()
+    yield history
+    history.close()
+
+
+def test_redact_configured_values(monkeypatch):
+    """Configured credential values are replaced wherever they appear"""
+    monkeypatch.setattr(retention, "SECRET_VALUES", ["s3cretPW", "bob@example.com"])
+    text = redact("log in as bob@example.com using s3cretPW")
+    assert "s3cretPW" not in text
+    assert "bob@example.com" not in text
+    assert text.count("***REDACTED***") == 2
+
+
+def test_redact_labelled_secrets():
+    """Labelled secrets are redacted even when the value is not configured"""
+    text = redact("Password: hunter2 api_key=sk-123 Auth token : abc")
+    assert text == (
+        "Password: ***REDACTED*** api_key=***REDACTED*** Auth token : ***REDACTED***"
+    )
+
+
+def test_redact_label_does_not_cross_lines():
+    """A label at the end of a line leaves the next line alone"""
+    text = "Password:\n        - Username: bob"
+    assert redact(text) == text
+
+
+def test_compact_archives_old_logs_by_filename_month(layout):
+    """Logs are bucketed by the date in their name, not their mtime"""
+    old_log = write_file(layout["logs"] / "appfolio_automation_20250904.log")
+    new_log = write_file(layout["logs"] / "appfolio_automation_20251019.log")
+
+    archived = compact(now=NOW)
+
+    archive_path = layout["logs"] / "archive" / "2025-09.zip"
+    assert archived == [(old_log, archive_path)]
+    assert not old_log.exists()
+    assert new_log.exists()
+    with zipfile.ZipFile(archive_path) as archive:
+        assert archive.namelist() == ["appfolio_automation_20250904.log"]
+
+
+def test_compact_redacts_archived_logs(layout):
+    """Logs written before redaction existed are redacted on their way into the archive"""
+    write_file(
+        layout["logs"] / "appfolio_automation_20250904.log",
+        "- Username: bob@example.com\n- Password: x\n",
+    )
+
+    compact(now=NOW)
+
+    with zipfile.ZipFile(layout["logs"] / "archive" / "2025-09.zip") as archive:
+        text = archive.read("appfolio_automation_20250904.log").decode()
+    assert text == "- Username: ***REDACTED***\n- Password: ***REDACTED***\n"
+
+
+def test_compact_skips_history_db(layout, history):
+    """The run history database is never archived"""
+    db = Path(retention.RETENTION_CONFIG["history_db"])
+    os.utime(db, (0, 0))
+    compact(now=NOW)
+    assert db.exists()
+
+
+def test_compact_only_touches_allow_listed_folders(layout):
+    """Document and ledger folders are left alone; allow-listed ones use their own cutoff"""
+    long_ago = datetime(2025, 1, 15)
+    lease = write_file(layout["leases"] / "lease.pdf", modified=long_ago)
+    ledger = write_file(layout["ledgers"] / "2025-01-15" / "gl.xlsx", modified=long_ago)
+    old_analysis = write_file(layout["analyzed"] / "2025-01" / "gl.csv", modified=long_ago)
+    recent_analysis = write_file(layout["analyzed"] / "gl.csv", modified=datetime(2025, 10, 1))
+
+    archived = compact(now=NOW)
+
+    archive_path = layout["analyzed"].parent / "archive" / "2025-01.zip"
+    assert archived == [(old_analysis, archive_path)]
+    assert lease.exists() and ledger.exists() and recent_analysis.exists()
+    assert not old_analysis.parent.exists()
+    assert layout["analyzed"].exists()
+    with zipfile.ZipFile(archive_path) as archive:
+        assert archive.namelist() == ["analyzed/2025-01/gl.csv"]
+
+
+def test_compact_prunes_empty_ledger_folders(layout):
+    """Empty dated ledger folders are removed while populated ones stay"""
+    empty = layout["ledgers"] / "2025-10-01"
+    empty.mkdir()
+    ledger = write_file(layout["ledgers"] / "2025-10-02" / "gl.xlsx")
+
+    compact(now=NOW)
+
+    assert not empty.exists()
+    assert ledger.exists()
+    assert layout["ledgers"].exists()
+
+
+def test_compact_keeps_duplicate_names(layout):
+    """A second file with the same archive name gets a numbered entry"""
+    long_ago = datetime(2025, 1, 15)
+    write_file(layout["analyzed"] / "gl.csv", "first", modified=long_ago)
+    compact(now=NOW)
+    write_file(layout["analyzed"] / "gl.csv", "second", modified=long_ago)
+    compact(now=NOW)
+
+    with zipfile.ZipFile(layout["analyzed"].parent / "archive" / "2025-01.zip") as archive:
+        assert archive.namelist() == ["analyzed/gl.csv", "analyzed/gl.1.csv"]
+        assert archive.read("analyzed/gl.1.csv") == b"second"
+
+
+def test_compact_marks_artifacts_archived(layout, history):
+    """Recorded artifacts point at their archive after compaction"""
+    run_id = history.start_run("daily")
+    output = layout["analyzed"] / "gl.csv"
+
+    async def step():
+        write_file(output)
+        return True
+
+    asyncio.run(history.track_step(run_id, "analyze", step()))
+    history.finish_run(run_id, "ok")
+    os.utime(output, (0, datetime(2025, 1, 15).timestamp()))
+
+    compact(history, now=NOW)
+
+    [artifact] = history.artifacts(run_id)
+    assert artifact["path"] == str(output)
+    assert artifact["archive_path"] == str(layout["analyzed"].parent / "archive" / "2025-01.zip")
+    assert artifact["archive_name"] == "analyzed/gl.csv"
+
+
+def test_compact_archives_tracked_downloads(layout, history):
+    """Browser downloads land in DATA_DIR, get recorded, then archived"""
+    run_id = history.start_run("daily")
+    download = retention.DATA_DIR / "General Ledger.xlsx"
+
+    async def step():
+        write_file(download)
+        return True
+
+    asyncio.run(history.track_step(run_id, "ledger_report", step()))
+    history.finish_run(run_id, "ok")
+    os.utime(download, (0, datetime(2025, 6, 3).timestamp()))
+
+    archived = compact(history, now=NOW)
+
+    archive_path = retention.DATA_DIR / "archive" / "2025-06.zip"
+    assert archived == [(download, archive_path)]
+    assert not download.exists()
+    with zipfile.ZipFile(archive_path) as archive:
+        assert archive.read("General Ledger.xlsx") == b"data"
+    [artifact] = history.artifacts(run_id)
+    assert artifact["path"] == str(download)
+    assert artifact["archive_path"] == str(archive_path)
+    assert artifact["archive_name"] == "General Ledger.xlsx"
+
+
+def test_track_step_success_records_artifacts(layout, history):
+    """A successful step is recorded with the files it produced"""
+    run_id = history.start_run("daily")
+    download = layout["ledgers"] / "gl.xlsx"
+
+    async def step():
+        write_file(download)
+        return True
+
+    assert asyncio.run(history.track_step(run_id, "ledger_report", step())) is True
+
+    [row] = history.steps(run_id)
+    assert (row["seq"], row["name"], row["status"], row["error"]) == (1, "ledger_report", "ok", None)
+    assert [a["path"] for a in history.artifacts(run_id)] == [str(download)]
+
+
+def test_track_step_failure(history):
+    """A falsy result marks the step failed"""
+    run_id = history.start_run("daily")
+
+    async def step():
+        return False
+
+    assert asyncio.run(history.track_step(run_id, "login", step())) is False
+    assert history.steps(run_id)[0]["status"] == "failed"
+
+
+def test_track_step_exception_is_redacted(history):
+    """Exceptions are recorded with secrets redacted and re-raised"""
+    run_id = history.start_run("daily")
+
+    async def step():
+        raise RuntimeError("login rejected for s3cretPW")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(history.track_step(run_id, "login", step()))
+
+    [row] = history.steps(run_id)
+    assert row["status"] == "error"
+    assert row["error"] == "login rejected for ***REDACTED***"
+
+
+def test_track_step_interrupt(history):
+    """KeyboardInterrupt propagates and the step is still recorded"""
+    run_id = history.start_run("daily")
+
+    async def step():
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        asyncio.run(history.track_step(run_id, "2fa", step()))
+
+    [row] = history.steps(run_id)
+    assert row["status"] == "interrupted"
+
+
+def test_runs_on(history):
+    """runs_on returns only runs started on that calendar day"""
+    rows = [
+        ("early", "2025-10-13 23:59:59"),
+        ("tuesday-1", "2025-10-14 00:00:00"),
+        ("tuesday-2", "2025-10-14 09:00:00"),
+        ("late", "2025-10-15 00:00:00"),
+    ]
+    with history.conn:
+        history.conn.executemany(
+            "INSERT INTO runs (run_id, kind, started_at, status) VALUES (?, 'daily', ?, 'ok')",
+            rows,
+        )
+
+    runs = history.runs_on(datetime(2025, 10, 14, 17, 30))
+    assert [run["run_id"] for run in runs] == ["tuesday-1", "tuesday-2"]